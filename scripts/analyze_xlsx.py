@@ -1,71 +1,159 @@
 import openpyxl
 import os
 import json
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+
+from xlsx_scan import BLANK_ROW_LIMIT, blank_stop_note, stored_dimension, trusted_max_row
 
 filepath = r"C:\Users\CoryD\OneDrive - Emjac Industries, Inc\Desktop\#9's.xlsx"
-print(f"File exists: {os.path.exists(filepath)}")
-print(f"File size: {os.path.getsize(filepath)} bytes")
 
-wb = openpyxl.load_workbook(filepath, data_only=True)
-print(f"\nSheet names: {wb.sheetnames}")
 
-for sheet_name in wb.sheetnames:
-    ws = wb[sheet_name]
-    print(f"\n{'='*80}")
-    print(f"SHEET: {sheet_name}")
-    print(f"Dimensions: {ws.dimensions}")
-    print(f"Max row: {ws.max_row}, Max col: {ws.max_column}")
+def analyze_sheet(filepath, sheet_name):
+    """Return the report lines for one sheet.
+
+    Each call opens its own read-only workbook so sheets can be analyzed in
+    separate processes.
+    """
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        return sheet_report(wb[sheet_name])
+    finally:
+        wb.close()
+
+
+def sheet_report(ws):
+    """Return the report lines for a sheet of an open read-only workbook."""
+    lines = []
+    out = lines.append
+    out(f"\n{'='*80}")
+    out(f"SHEET: {ws.title}")
+    dimension = stored_dimension(ws)
+    stored_max_row = ws.max_row
+    last_row = trusted_max_row(ws) or 0
+    if dimension is None:
+        out("Dimensions: unsized (no stored dimension)")
+    else:
+        out(f"Dimensions: {dimension}")
+        out(f"Max row: {ws.max_row}, Max col: {ws.max_column}")
+    ws.reset_dimensions()
     
-    # Find the header row (first non-empty row)
+    # Find the header row: the first of the first nine rows with more than
+    # three values. Only these rows are read at full width.
+    head_rows = list(ws.iter_rows(max_row=9, values_only=True))
     header_row = None
-    for row_idx in range(1, min(10, ws.max_row + 1)):
-        row_vals = [cell.value for cell in ws[row_idx]]
-        non_empty = [v for v in row_vals if v is not None]
-        if len(non_empty) > 3:
+    header_values = ()
+    for row_idx, row_vals in enumerate(head_rows, 1):
+        if len(row_vals) - row_vals.count(None) > 3:
             header_row = row_idx
+            header_values = row_vals
             break
     
+    headers = [(i, str(v)) for i, v in enumerate(header_values, 1) if v is not None]
+    col_types = {col_idx: {} for col_idx, _ in headers}
+    col_samples = {col_idx: [] for col_idx, _ in headers}
     if header_row is None:
-        print("  Could not find header row")
-        continue
+        rows = ws.iter_rows(values_only=True)
+    else:
+        # Data rows stop at the last header column, so trailing phantom
+        # columns are never emitted by the reader
+        rows = chain(head_rows[:header_row],
+                     ws.iter_rows(min_row=header_row + 1, max_col=headers[-1][0], values_only=True))
     
-    print(f"\nHeader Row: {header_row}")
-    headers = []
-    for i, cell in enumerate(ws[header_row], 1):
-        if cell.value is not None:
-            headers.append((i, str(cell.value)))
-            print(f"  Col {i}: {cell.value}")
+    # Walk the rest of the sheet once: track the populated extent, keep the
+    # first 10 data rows as samples, tally column types over the first 100,
+    # and count non-empty rows.
+    sample_rows = []
+    actual_rows = 0
+    max_row = max_col = 0
+    blank_run = 0
+    stop_row = None
+    for row_idx, row_vals in enumerate(rows, 1):
+        width = len(row_vals)
+        non_empty_count = width - row_vals.count(None)
+        if not non_empty_count:
+            blank_run += 1
+            if blank_run > BLANK_ROW_LIMIT and row_idx > last_row:
+                stop_row = row_idx
+                break
+            continue
+        blank_run = 0
+        max_row = row_idx
+        if width > max_col and row_vals[max_col:].count(None) != width - max_col:
+            max_col = width
+            while row_vals[max_col - 1] is None:
+                max_col -= 1
+        
+        if header_row is None or row_idx <= header_row:
+            continue
+        
+        actual_rows += 1
+        if row_idx <= header_row + 10:
+            sample_rows.append((row_idx, row_vals))
+        if row_idx <= header_row + 100:
+            for col_idx, _ in headers:
+                val = row_vals[col_idx - 1]
+                if val is not None:
+                    types = col_types[col_idx]
+                    t = type(val)
+                    types[t] = types.get(t, 0) + 1
+                    if len(col_samples[col_idx]) < 5:
+                        col_samples[col_idx].append(str(val)[:50])
+    
+    out(f"Data extent: {max_row} rows x {max_col} cols")
+    note = blank_stop_note(stop_row, stored_max_row)
+    if note:
+        out(note)
+    
+    if header_row is None:
+        out("  Could not find header row")
+        return lines
+    
+    out(f"\nHeader Row: {header_row}")
+    for i, val in enumerate(header_values, 1):
+        if val is not None:
+            out(f"  Col {i}: {val}")
     
     # Show sample data rows
-    print(f"\n--- Sample Data (first 10 data rows) ---")
-    data_start = header_row + 1
-    row_count = 0
-    for row_idx in range(data_start, min(data_start + 10, ws.max_row + 1)):
-        row_vals = [cell.value for cell in ws[row_idx]]
-        if any(v is not None for v in row_vals):
-            row_count += 1
-            print(f"  Row {row_idx}: {row_vals}")
+    out(f"\n--- Sample Data (first 10 data rows) ---")
+    for row_idx, row_vals in sample_rows:
+        row_vals = list(row_vals[:max_col]) + [None] * (max_col - len(row_vals))
+        out(f"  Row {row_idx}: {row_vals}")
     
     # Analyze data types per column
-    print(f"\n--- Column Data Type Analysis ---")
+    out(f"\n--- Column Data Type Analysis ---")
     for col_idx, col_name in headers:
-        types = Counter()
-        sample_vals = []
-        for row_idx in range(data_start, min(data_start + 100, ws.max_row + 1)):
-            val = ws.cell(row=row_idx, column=col_idx).value
-            if val is not None:
-                types[type(val).__name__] += 1
-                if len(sample_vals) < 5:
-                    sample_vals.append(str(val)[:50])
-        print(f"  {col_name}: types={dict(types)}, samples={sample_vals}")
+        type_names = {t.__name__: n for t, n in col_types[col_idx].items()}
+        out(f"  {col_name}: types={type_names}, samples={col_samples[col_idx]}")
     
-    # Count actual data rows (non-empty)
-    actual_rows = 0
-    for row_idx in range(data_start, ws.max_row + 1):
-        row_vals = [cell.value for cell in ws[row_idx]]
-        if any(v is not None for v in row_vals):
-            actual_rows += 1
-    print(f"\nTotal data rows (non-empty): {actual_rows}")
+    out(f"\nTotal data rows (non-empty): {actual_rows}")
+    return lines
+
+
+def main():
+    print(f"File exists: {os.path.exists(filepath)}")
+    print(f"File size: {os.path.getsize(filepath)} bytes")
+
+    # Sheets are independent, so spread them across processes, each opening
+    # its own copy. A single sheet is analyzed inline on the workbook already
+    # opened for the sheet list, skipping the worker start-up and second load.
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet_names = wb.sheetnames
+        print(f"\nSheet names: {sheet_names}")
+        if len(sheet_names) == 1:
+            reports = [sheet_report(wb[sheet_names[0]])]
+    finally:
+        wb.close()
+    if len(sheet_names) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(sheet_names), os.cpu_count() or 1)) as ex:
+            reports = list(ex.map(partial(analyze_sheet, filepath), sheet_names))
+    for lines in reports:
+        print("\n".join(lines))
+
+    print("\n\nDONE")
+
 
-print("\n\nDONE")
+if __name__ == "__main__":
+    main()
@@ -1,187 +1,304 @@
+import hashlib
 import openpyxl
-from collections import Counter, defaultdict
+import os
+import pickle
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+from xlsx_scan import BLANK_ROW_LIMIT, blank_stop_note, trusted_max_row
 
 filepath = r"C:\Users\CoryD\OneDrive - Emjac Industries, Inc\Desktop\#9's.xlsx"
-wb = openpyxl.load_workbook(filepath, data_only=True)
-ws = wb['JCS']
-
-# Understand the hierarchical structure
-# Let's categorize each row type
-print("=== ROW TYPE ANALYSIS ===")
-customer_rows = 0
-job_rows = 0
-component_rows = 0
-other_rows = 0
-
-jobs = set()
-customers = set()
-sales_orders = set()
-components = set()
-vendors = set()
-po_numbers = set()
-code_sorts = Counter()
-
-# Track jobs and their components
-job_components = defaultdict(list)
-current_customer = None
-current_job = None
-current_mark = None
-
-for row_idx in range(2, ws.max_row + 1):
-    row = {
-        'Text48': ws.cell(row=row_idx, column=1).value,
-        'Auto_Date': ws.cell(row=row_idx, column=2).value,
-        'SALES_ORDER': ws.cell(row=row_idx, column=3).value,
-        'MARK_INFO': ws.cell(row=row_idx, column=4).value,
-        'SALESPERSON': ws.cell(row=row_idx, column=5).value,
-        'CUSTOMER': ws.cell(row=row_idx, column=6).value,
-        'CODE_SORT': ws.cell(row=row_idx, column=7).value,
-        'JOB': ws.cell(row=row_idx, column=8).value,
-        'PART_CUSTOMER': ws.cell(row=row_idx, column=9).value,
-        'Text72': ws.cell(row=row_idx, column=10).value,
-        'COMPONENT': ws.cell(row=row_idx, column=11).value,
-        'DESCRIPTION': ws.cell(row=row_idx, column=12).value,
-        'UM': ws.cell(row=row_idx, column=13).value,
-        'QTY_COMMITTED': ws.cell(row=row_idx, column=14).value,
-        'QTY_ISSUED': ws.cell(row=row_idx, column=15).value,
-        'QTY_ONHAND': ws.cell(row=row_idx, column=16).value,
-        'PURCHASE_ORDER': ws.cell(row=row_idx, column=17).value,
-        'VENDOR': ws.cell(row=row_idx, column=18).value,
-        'QTY_ORDER': ws.cell(row=row_idx, column=19).value,
-        'QTY_RECEIVED': ws.cell(row=row_idx, column=20).value,
-        'DATE_DUE_LINE': ws.cell(row=row_idx, column=21).value,
-        'DATE_LAST_RECEIVED': ws.cell(row=row_idx, column=22).value,
-    }
-    
-    if row['MARK_INFO'] and row['CUSTOMER']:
-        # This is a customer/project header row
-        customer_rows += 1
-        current_customer = row['CUSTOMER']
-        current_mark = row['MARK_INFO']
-        customers.add(current_customer)
-        if row['SALES_ORDER']:
-            sales_orders.add(row['SALES_ORDER'])
-        if row['CODE_SORT']:
-            code_sorts[row['CODE_SORT']] += 1
-    elif row['JOB']:
-        # This is a job row
-        job_rows += 1
-        current_job = row['JOB']
-        jobs.add(current_job)
-    elif row['COMPONENT']:
-        # This is a component detail row
-        component_rows += 1
-        components.add(row['COMPONENT'])
-        if row['VENDOR']:
-            vendors.add(row['VENDOR'])
-        if row['PURCHASE_ORDER']:
-            po_numbers.add(row['PURCHASE_ORDER'])
+
+
+class JcsRow(NamedTuple):
+    """One JCS data row, in sheet column order."""
+    text48: object
+    auto_date: object
+    sales_order: object
+    mark_info: object
+    salesperson: object
+    customer: object
+    code_sort: object
+    job: object
+    part_customer: object
+    text72: object
+    component: object
+    description: object
+    um: object
+    qty_committed: object
+    qty_issued: object
+    qty_onhand: object
+    purchase_order: object
+    vendor: object
+    qty_order: object
+    qty_received: object
+    date_due_line: object
+    date_last_received: object
+
+
+# Low-cardinality text columns. Interning them at load lets repeated values
+# share one string object, in memory and in the pickled row cache.
+INTERNED_COLUMNS = tuple(JcsRow._fields.index(name) for name in (
+    'mark_info', 'salesperson', 'customer', 'code_sort', 'part_customer', 'um', 'vendor',
+))
+
+# Bump when load_jcs_rows() changes what it stores so older caches are ignored
+JCS_CACHE_VERSION = 4
+
+# Caches live in the user's local (non-synced) app data, never beside the
+# workbook, so a pickle from a shared folder is never loaded
+JCS_CACHE_DIR = Path(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()) / 'jcs-analysis'
+
+
+@dataclass(slots=True)
+class Component:
+    """A component row under a job. Cell values are kept as read from the sheet;
+    the committed/issued/onhand quantities are 0 when the cell is blank."""
+    component: object
+    description: object
+    qty_committed: object
+    qty_issued: object
+    qty_onhand: object
+    has_po: bool
+    po: object
+    vendor: object
+    qty_ordered: object
+    qty_received: object
+    date_due: str | None
+    shortage: object
+
+
+def load_jcs_rows(filepath):
+    """Return (rows, note) for the JCS sheet, caching them between runs.
+
+    rows are 22-value tuples (see JcsRow); note is the blank_stop_note() for
+    the scan, or None.
+
+    The cache is a pickle in JCS_CACHE_DIR named after a hash of the workbook
+    path. It is only reused when it was written by the same loader version for
+    the same workbook path, size and mtime; an unreadable cache is re-parsed.
+    Trailing blank rows are dropped and the INTERNED_COLUMNS strings are
+    interned.
+    """
+    source = Path(filepath).resolve()
+    stat = source.stat()
+    cache_key = (JCS_CACHE_VERSION, str(source), stat.st_size, stat.st_mtime_ns)
+    cache_name = hashlib.sha256(str(source).encode()).hexdigest()[:16]
+    cache_path = JCS_CACHE_DIR / f"{cache_name}.JCS.pickle"
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['key'] == cache_key:
+            return cached['rows'], cached['note']
+    except (OSError, EOFError, AttributeError, ImportError, IndexError, KeyError,
+            TypeError, ValueError, pickle.UnpicklingError):
+        pass
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    ws = wb['JCS']
+    stored_max_row = ws.max_row
+    last_row = trusted_max_row(ws) or 0
+    ws.reset_dimensions()
+    rows = []
+    stop_row = None
+    # Blank rows are held back and only kept once more data follows them
+    pending_blanks = []
+    intern = sys.intern
+    jcs_rows = ws.iter_rows(min_row=2, max_col=len(JcsRow._fields), values_only=True)
+    for row_idx, row_vals in enumerate(jcs_rows, 2):
+        if row_vals.count(None) == len(row_vals):
+            pending_blanks.append(row_vals)
+            if len(pending_blanks) > BLANK_ROW_LIMIT and row_idx > last_row:
+                stop_row = row_idx
+                break
+            continue
+        if pending_blanks:
+            rows.extend(pending_blanks)
+            pending_blanks.clear()
+        row = list(row_vals)
+        for i in INTERNED_COLUMNS:
+            if type(row[i]) is str:
+                row[i] = intern(row[i])
+        rows.append(tuple(row))
+    wb.close()
+    note = blank_stop_note(stop_row, stored_max_row)
+
+    try:
+        JCS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'key': cache_key, 'rows': rows, 'note': note}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return rows, note
+
+
+def main():
+    rows, scan_note = load_jcs_rows(filepath)
+
+    # Understand the hierarchical structure
+    # Let's categorize each row type
+    print("=== ROW TYPE ANALYSIS ===")
+    customer_rows = 0
+    job_rows = 0
+    component_rows = 0
+    other_rows = 0
+
+    jobs = set()
+    customers = set()
+    sales_orders = set()
+    components = set()
+    vendors = set()
+    po_numbers = set()
+    code_sorts = Counter()
+    # Bind the per-row set insertions once rather than resolving .add each row
+    add_job = jobs.add
+    add_customer = customers.add
+    add_sales_order = sales_orders.add
+    add_component = components.add
+    add_vendor = vendors.add
+    add_po_number = po_numbers.add
+
+    # PO status and stock availability are tallied as component rows stream past
+    total_components_with_po = 0
+    total_components_stock = 0
+    po_received_complete = 0
+    po_partially_received = 0
+    po_not_received = 0
+    stock_sufficient = 0
+    stock_shortage = 0
+
+    # Jobs with at least one PO component; the example breakdowns are built
+    # from the lowest-numbered of these once the counts are done
+    po_jobs = set()
+    add_po_job = po_jobs.add
+    current_customer = None
+    current_job = None
+    current_mark = None
+
+    for r in map(JcsRow._make, rows):
+        if r.mark_info and r.customer:
+            # This is a customer/project header row
+            customer_rows += 1
+            current_customer = r.customer
+            current_mark = r.mark_info
+            add_customer(current_customer)
+            if r.sales_order:
+                add_sales_order(r.sales_order)
+            if r.code_sort:
+                code_sorts[r.code_sort] += 1
+        elif r.job:
+            # This is a job row
+            job_rows += 1
+            current_job = r.job
+            add_job(current_job)
+        elif r.component:
+            # This is a component detail row
+            component_rows += 1
+            add_component(r.component)
+            if r.vendor:
+                add_vendor(r.vendor)
+            if r.purchase_order:
+                add_po_number(r.purchase_order)
         
-        if current_job:
-            has_po = row['PURCHASE_ORDER'] is not None
-            qty_committed = row['QTY_COMMITTED'] or 0
-            qty_onhand = row['QTY_ONHAND'] or 0
-            qty_issued = row['QTY_ISSUED'] or 0
-            shortage = qty_committed - qty_onhand if qty_committed > qty_onhand else 0
-            
-            job_components[current_job].append({
-                'component': row['COMPONENT'],
-                'description': row['DESCRIPTION'],
-                'qty_committed': qty_committed,
-                'qty_issued': qty_issued,
-                'qty_onhand': qty_onhand,
-                'has_po': has_po,
-                'po': row['PURCHASE_ORDER'],
-                'vendor': row['VENDOR'],
-                'qty_ordered': row['QTY_ORDER'],
-                'qty_received': row['QTY_RECEIVED'],
-                'date_due': str(row['DATE_DUE_LINE']) if row['DATE_DUE_LINE'] else None,
-                'shortage': shortage,
-            })
-    else:
-        other_rows += 1
-
-print(f"Customer/Project header rows: {customer_rows}")
-print(f"Job rows: {job_rows}")
-print(f"Component detail rows: {component_rows}")
-print(f"Other/empty rows: {other_rows}")
-
-print(f"\n=== UNIQUE COUNTS ===")
-print(f"Unique customers: {len(customers)}")
-print(f"Unique jobs: {len(jobs)}")
-print(f"Unique sales orders: {len(sales_orders)}")
-print(f"Unique components: {len(components)}")
-print(f"Unique vendors: {len(vendors)}")
-print(f"Unique PO numbers: {len(po_numbers)}")
-
-print(f"\n=== CODE_SORT VALUES ===")
-for code, count in code_sorts.most_common():
-    print(f"  {code}: {count}")
-
-print(f"\n=== CUSTOMER LIST ===")
-for c in sorted(customers):
-    print(f"  {c}")
-
-print(f"\n=== SALES ORDER LIST ===")
-for so in sorted(sales_orders):
-    print(f"  {so}")
-
-print(f"\n=== JOB LIST ===")
-for j in sorted(jobs):
-    print(f"  {j}")
-
-# Analyze component shortages and PO status
-print(f"\n=== PURCHASE ORDER ANALYSIS ===")
-total_components_with_po = 0
-total_components_stock = 0
-po_received_complete = 0
-po_partially_received = 0
-po_not_received = 0
-
-for job, comps in job_components.items():
-    for comp in comps:
-        if comp['has_po']:
-            total_components_with_po += 1
-            qty_ord = comp['qty_ordered'] or 0
-            qty_rec = comp['qty_received'] or 0
-            if qty_rec >= qty_ord and qty_ord > 0:
-                po_received_complete += 1
-            elif qty_rec > 0:
-                po_partially_received += 1
-            else:
-                po_not_received += 1
+            if current_job:
+                has_po = r.purchase_order is not None
+                qty_committed = r.qty_committed or 0
+                qty_onhand = r.qty_onhand or 0
+
+                if has_po:
+                    total_components_with_po += 1
+                    add_po_job(current_job)
+                    qty_ord = r.qty_order or 0
+                    qty_rec = r.qty_received or 0
+                    if qty_rec >= qty_ord and qty_ord > 0:
+                        po_received_complete += 1
+                    elif qty_rec > 0:
+                        po_partially_received += 1
+                    else:
+                        po_not_received += 1
+                else:
+                    total_components_stock += 1
+                    if qty_onhand >= qty_committed:
+                        stock_sufficient += 1
+                    else:
+                        stock_shortage += 1
         else:
-            total_components_stock += 0
-
-print(f"Components with PO (#9 purchases): {total_components_with_po}")
-print(f"PO fully received: {po_received_complete}")
-print(f"PO partially received: {po_partially_received}")
-print(f"PO not yet received: {po_not_received}")
-
-# Analyze stock shortages
-print(f"\n=== STOCK AVAILABILITY ANALYSIS ===")
-stock_sufficient = 0
-stock_shortage = 0
-for job, comps in job_components.items():
-    for comp in comps:
-        if not comp['has_po']:
-            if comp['qty_onhand'] >= comp['qty_committed']:
-                stock_sufficient += 1
-            else:
-                stock_shortage += 1
-
-print(f"Stock items with sufficient qty: {stock_sufficient}")
-print(f"Stock items with shortage: {stock_shortage}")
-
-# Show a few example jobs with their full component breakdown
-print(f"\n=== EXAMPLE JOB BREAKDOWNS (first 3 jobs with POs) ===")
-shown = 0
-for job in sorted(job_components.keys()):
-    comps = job_components[job]
-    has_any_po = any(c['has_po'] for c in comps)
-    if has_any_po and shown < 3:
-        shown += 1
+            other_rows += 1
+
+    print(f"Customer/Project header rows: {customer_rows}")
+    print(f"Job rows: {job_rows}")
+    print(f"Component detail rows: {component_rows}")
+    print(f"Other/empty rows: {other_rows}")
+    if scan_note:
+        print(scan_note)
+
+    print(f"\n=== UNIQUE COUNTS ===")
+    print(f"Unique customers: {len(customers)}")
+    print(f"Unique jobs: {len(jobs)}")
+    print(f"Unique sales orders: {len(sales_orders)}")
+    print(f"Unique components: {len(components)}")
+    print(f"Unique vendors: {len(vendors)}")
+    print(f"Unique PO numbers: {len(po_numbers)}")
+
+    print(f"\n=== CODE_SORT VALUES ===")
+    for code, count in code_sorts.most_common():
+        print(f"  {code}: {count}")
+
+    print(f"\n=== CUSTOMER LIST ===")
+    for c in sorted(customers):
+        print(f"  {c}")
+
+    print(f"\n=== SALES ORDER LIST ===")
+    for so in sorted(sales_orders):
+        print(f"  {so}")
+
+    print(f"\n=== JOB LIST ===")
+    for j in sorted(jobs):
+        print(f"  {j}")
+
+    print(f"\n=== PURCHASE ORDER ANALYSIS ===")
+    print(f"Components with PO (#9 purchases): {total_components_with_po}")
+    print(f"Components from stock: {total_components_stock}")
+    print(f"PO fully received: {po_received_complete}")
+    print(f"PO partially received: {po_partially_received}")
+    print(f"PO not yet received: {po_not_received}")
+
+    print(f"\n=== STOCK AVAILABILITY ANALYSIS ===")
+    print(f"Stock items with sufficient qty: {stock_sufficient}")
+    print(f"Stock items with shortage: {stock_shortage}")
+
+    # Show a few example jobs with their full component breakdown
+    print(f"\n=== EXAMPLE JOB BREAKDOWNS (first 3 jobs with POs) ===")
+    # A job can recur further down the sheet, so walk the rows again and
+    # collect every component filed under the chosen jobs
+    example_jobs = {job: [] for job in sorted(po_jobs)[:3]}
+    current_job_append = None
+    for r in map(JcsRow._make, rows):
+        if r.mark_info and r.customer:
+            continue
+        if r.job:
+            comps = example_jobs.get(r.job)
+            current_job_append = comps.append if comps is not None else None
+        elif r.component and current_job_append:
+            qty_committed = r.qty_committed or 0
+            qty_onhand = r.qty_onhand or 0
+            shortage = qty_committed - qty_onhand if qty_committed > qty_onhand else 0
+            current_job_append(Component(
+                r.component, r.description, qty_committed, r.qty_issued or 0, qty_onhand,
+                r.purchase_order is not None, r.purchase_order, r.vendor, r.qty_order,
+                r.qty_received, str(r.date_due_line) if r.date_due_line else None, shortage,
+            ))
+    for job in sorted(example_jobs):
         print(f"\n  JOB: {job}")
-        for c in comps:
-            po_info = f"PO#{c['po']} vendor:{c['vendor']} ordered:{c['qty_ordered']} rcvd:{c['qty_received']} due:{c['date_due']}" if c['has_po'] else "STOCK"
-            print(f"    {c['component']} - {c['description']}: committed={c['qty_committed']} onhand={c['qty_onhand']} issued={c['qty_issued']} | {po_info}")
+        for c in example_jobs[job]:
+            po_info = f"PO#{c.po} vendor:{c.vendor} ordered:{c.qty_ordered} rcvd:{c.qty_received} due:{c.date_due}" if c.has_po else "STOCK"
+            print(f"    {c.component} - {c.description}: committed={c.qty_committed} onhand={c.qty_onhand} issued={c.qty_issued} | {po_info}")
+
+
+if __name__ == "__main__":
+    main()
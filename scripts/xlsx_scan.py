@@ -0,0 +1,39 @@
+"""Scan limits shared by the workbook analysis scripts."""
+
+# Stop scanning after this many consecutive empty rows once past the stored
+# last row. Some exports trail thousands of formatted-but-empty rows, or store
+# no dimension or the A1:XFD1048576 sentinel, so there is nothing trustworthy
+# to stop at. Rows up to a real stored last row are always read, however long
+# the gaps; a stop anywhere else is reported with blank_stop_note().
+BLANK_ROW_LIMIT = 50
+
+# Last row of an Excel sheet; a stored dimension reaching it is not a real extent
+EXCEL_MAX_ROW = 1048576
+
+
+def stored_dimension(ws):
+    """Return the dimension stored in a read-only sheet, or None if it has none."""
+    try:
+        return ws.calculate_dimension()
+    except ValueError:
+        return None
+
+
+def trusted_max_row(ws):
+    """Return the stored last row of a read-only sheet, or None if it can't be trusted."""
+    max_row = ws.max_row
+    if max_row is None or max_row >= EXCEL_MAX_ROW:
+        return None
+    return max_row
+
+
+def blank_stop_note(stop_row, stored_max_row):
+    """Return a report line when the blank-row limit may have cut the scan short."""
+    if stop_row is None or (stored_max_row is not None and stored_max_row <= stop_row):
+        return None
+    if stored_max_row is None:
+        claim = "the sheet stores no dimension"
+    else:
+        claim = f"the stored dimension claims {stored_max_row} rows"
+    return (f"Note: scan stopped at row {stop_row} after {BLANK_ROW_LIMIT} consecutive "
+            f"blank rows; {claim}, so any data below was not read.")